@@ -1,21 +1,35 @@
+import re
+from dataclasses import dataclass
 from langgraph.graph import StateGraph, START, END
-from pydantic import BaseModel
 
 # ---------- 1) Graph state ----------
-class AgentState(BaseModel):
+# Plain mutable dataclass: nodes update it in place instead of validating a copy on every hop
+@dataclass(slots=True)
+class AgentState:
     question: str
     intent: str | None = None   # "kpi" | "sentiment" | "fallback"
     answer: str | None = None
 
 # ---------- 2) Planner (sets intent) ----------
+INTENT_KEYWORDS = {
+    "kpi": ("revenue", "sales", "units", "trend", "top", "leaderboard"),
+    "sentiment": ("sentiment", "feedback", "review"),
+}
+KEYWORD_INTENT = {k: intent for intent, kws in INTENT_KEYWORDS.items() for k in kws}
+# One alternation compiled at import; the lookahead reports overlapping hits so
+# a KPI keyword can never swallow the start of a sentiment keyword.
+KEYWORD_RE = re.compile("(?=(" + "|".join(map(re.escape, KEYWORD_INTENT)) + "))")
+
 def node_plan(state: AgentState) -> AgentState:
     q = state.question.lower()
     intent = "fallback"
-    if any(k in q for k in ["revenue", "sales", "units", "trend", "top", "leaderboard"]):
-        intent = "kpi"
-    if any(k in q for k in ["sentiment", "feedback", "review"]):
-        intent = "sentiment"
-    return state.model_copy(update={"intent": intent})
+    # single scan over the question; sentiment wins over kpi
+    for m in KEYWORD_RE.finditer(q):
+        intent = KEYWORD_INTENT[m.group(1)]
+        if intent == "sentiment":
+            break
+    state.intent = intent
+    return state
 
 # Router function used by add_conditional_edges
 def route_from_intent(state: AgentState) -> str:
@@ -24,14 +38,17 @@ def route_from_intent(state: AgentState) -> str:
 # ---------- 3) Branch nodes ----------
 def node_kpi(state: AgentState) -> AgentState:
     # (Stub) In Step 3 we'll compute from CSV via pandas
-    return state.model_copy(update={"answer": "KPI branch: I would compute metrics (revenue/units) and return a chart."})
+    state.answer = "KPI branch: I would compute metrics (revenue/units) and return a chart."
+    return state
 
 def node_sentiment(state: AgentState) -> AgentState:
     # (Stub) In Step 3 we'll aggregate feedback by day and plot
-    return state.model_copy(update={"answer": "Sentiment branch: I would aggregate daily sentiment from feedback data and plot a trend."})
+    state.answer = "Sentiment branch: I would aggregate daily sentiment from feedback data and plot a trend."
+    return state
 
 def node_fallback(state: AgentState) -> AgentState:
-    return state.model_copy(update={"answer": "Sorry, I didn’t understand. Try asking about revenue trend, top products, store leaderboard, or sentiment."})
+    state.answer = "Sorry, I didn’t understand. Try asking about revenue trend, top products, store leaderboard, or sentiment."
+    return state
 
 # ---------- 4) Build the graph ----------
 def build_graph():
@@ -1,8 +1,11 @@
 from __future__ import annotations
-import os, re, csv, io, sys
+import os, re, csv, io, sys, asyncio
 from typing import List, Tuple, Optional
+from dataclasses import dataclass, field
+from functools import lru_cache
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
-from pydantic import BaseModel
 from langgraph.graph import StateGraph, START, END
 from langchain.chat_models import init_chat_model
 from langchain_community.utilities import SQLDatabase
@@ -11,109 +14,169 @@ from langchain.agents.agent_toolkits import SQLDatabaseToolkit, create_sql_agent
 DB_PATH = os.getenv("LTW_DB_PATH", "data/lt_walmart_data.db")
 OUT_DIR = "./outputs"; os.makedirs(OUT_DIR, exist_ok=True)
 
-# ---------- Build the SQL agent once ----------
-db = SQLDatabase.from_uri(
-    f"sqlite:///{DB_PATH}",
-    include_tables=["sales_data", "products", "stores", "inventory", "customer_feedback"],
-    sample_rows_in_table_info=2,
-)
-llm = init_chat_model("gemini-2.5-flash", model_provider="google_vertexai")
-toolkit = SQLDatabaseToolkit(db=db, llm=llm)
-sql_agent = create_sql_agent(
-    llm=llm,
-    toolkit=toolkit,
-    agent_type="tool-calling",
-    verbose=True
-)
+# ---------- Build the SQL agent once, on first use ----------
+@lru_cache(maxsize=1)
+def get_sql_agent():
+    """Connect to the DB and build the LLM + SQL agent lazily, so importing this module stays cheap."""
+    db = SQLDatabase.from_uri(
+        f"sqlite:///{DB_PATH}",
+        include_tables=["sales_data", "products", "stores", "inventory", "customer_feedback"],
+        sample_rows_in_table_info=2,
+    )
+    llm = init_chat_model("gemini-2.5-flash", model_provider="google_vertexai")
+    toolkit = SQLDatabaseToolkit(db=db, llm=llm)
+    return create_sql_agent(
+        llm=llm,
+        toolkit=toolkit,
+        agent_type="tool-calling",
+        verbose=True
+    )
 
 SAFETY_PREFIX = (
     "Use only SELECT. Never modify data. "
-    "If grouping by day, use DATE(Date) AS Date. "
+    "All timestamps are UTC. "
+    "sales_data.Date is stored as INTEGER unix epoch seconds: "
+    "filter it against raw seconds, e.g. Date >= CAST(strftime('%s','now','-30 day') AS INTEGER), "
+    "and if grouping sales by day, use DATE(Date,'unixepoch') AS Date; "
+    "for other tables use DATE(Date) AS Date. "
     "When feasible, return results as CSV (first line headers, comma-separated)."
 )
 
+# Code fences the agent sometimes wraps CSV answers in
+FENCE_OPEN_RE = re.compile(r"^```(csv|CSV)?", re.M)
+FENCE_CLOSE_RE = re.compile(r"```$", re.M)
+# Full calendar date at the start of a value; bare years or year-months stay categorical
+FULL_DATE_PATTERN = r"\s*\d{4}-\d{2}-\d{2}"
+
 # ---------- LangGraph state ----------
-class AgentState(BaseModel):
-    question: str
-    raw_output: str | None = None
-    result_csv_path: str | None = None
-    chart_png_path: str | None = None
-    message: str | None = None
+@dataclass(slots=True)
+class AgentState:
+    questions: list[str]
+    raw_outputs: list[str | None] = field(default_factory=list)
+    errors: list[str | None] = field(default_factory=list)
+    result_csv_paths: list[str | None] = field(default_factory=list)
+    chart_png_paths: list[str | None] = field(default_factory=list)
+    messages: list[str] = field(default_factory=list)
 
 # ---------- Helpers ----------
-def parse_csv_from_text(text: str) -> Optional[Tuple[List[str], List[List[str]]]]:
+def parse_and_save(text: str, path: str) -> Optional[Tuple[List[str], List[str], List[str]]]:
     """
-    Heuristic: if the agent returns CSV (headers on first line), parse it.
+    Heuristic: if the agent returns CSV (headers on first line), stream it to `path`
+    in one pass and return the header plus the first two columns (all the chart needs).
     Otherwise return None and we'll leave just the text answer.
     """
+    stripped = text.strip()
     # Quick check: at least two commas in the first line
-    first_line = text.strip().splitlines()[0] if text.strip().splitlines() else ""
+    nl = stripped.find("\n")
+    first_line = stripped if nl == -1 else stripped[:nl]
     if first_line.count(",") < 1:
         return None
     # Remove code fences if present
-    cleaned = re.sub(r"^```(csv|CSV)?", "", text.strip(), flags=re.M)
-    cleaned = re.sub(r"```$", "", cleaned, flags=re.M)
+    cleaned = FENCE_OPEN_RE.sub("", stripped)
+    cleaned = FENCE_CLOSE_RE.sub("", cleaned)
+    # Write next to the target and only move it into place once every row checked out
+    tmp_path = path + ".tmp"
     try:
         reader = csv.reader(io.StringIO(cleaned))
-        rows = list(reader)
-        if not rows:
-            return None
-        header = rows[0]
-        data = rows[1:]
-        # basic sanity: same number of cols
-        if any(len(r) != len(header) for r in data):
+        header = next(reader, None)
+        if not header:
             return None
-        return header, data
+        x, y = [], []
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f); w.writerow(header)
+            for r in reader:
+                # basic sanity: same number of cols
+                if len(r) != len(header):
+                    raise ValueError("ragged CSV row")
+                w.writerow(r)
+                if len(r) >= 2:
+                    x.append(r[0]); y.append(r[1])
+        os.replace(tmp_path, path)
+        return header, x, y
     except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return None
 
-def save_table(header: List[str], rows: List[List[str]], path: str) -> None:
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f); w.writerow(header); w.writerows(rows)
+def indexed_path(path: str, i: int, n: int) -> str:
+    """Keep the plain file name for a single question, suffix with the index for batches."""
+    if n == 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{i}{ext}"
 
-def maybe_chart(header: List[str], rows: List[List[str]], question: str) -> Optional[str]:
-    if len(header) < 2 or not rows:
+def maybe_chart(header: List[str], x: List[str], y: List[str], question: str, out_png: str) -> Optional[str]:
+    if len(header) < 2 or not x:
         return None
     # try cast second column to float; if fails, skip chart
     try:
-        y = [float(r[1]) for r in rows]
-    except Exception:
+        y = np.asarray(y, dtype=np.float64)
+    except ValueError:
         return None
-    x = [r[0] for r in rows]
-    fig = plt.figure(figsize=(9,4.5))
-    # try time series
-    from datetime import datetime as dt
-    try:
-        xdt = [dt.fromisoformat(str(v)) for v in x]
-        plt.plot(xdt, y)
-        plt.xlabel(header[0]); plt.ylabel(header[1]); plt.title(question)
-    except Exception:
-        plt.bar([str(v) for v in x[:30]], y[:30])
-        plt.xticks(rotation=45, ha="right", fontsize=8)
-        plt.ylabel(header[1]); plt.title(question)
+    fig, ax = plt.subplots(figsize=(9,4.5))
+    # time series only when every x value is a full ISO date, as fromisoformat used to require;
+    # unparseable values come back as NaT.
+    # Offsets are normalised to naive UTC so matplotlib skips per-point tz arithmetic.
+    is_time_series = bool(pd.Series(x, dtype=object).str.match(FULL_DATE_PATTERN).all())
+    if is_time_series:
+        xdt = pd.to_datetime(x, format="ISO8601", utc=True, errors="coerce").tz_convert(None)
+        is_time_series = not xdt.isna().any()
+    if is_time_series:
+        # limits are known up front, so skip matplotlib's autoscale pass; NaN/inf values
+        # are left out, and degenerate (single-point or flat) ranges fall back to autoscaling
+        finite_y = y[np.isfinite(y)]
+        x_lo, x_hi = xdt.min(), xdt.max()
+        if finite_y.size and finite_y.min() < finite_y.max() and x_lo < x_hi:
+            y_lo, y_hi = finite_y.min(), finite_y.max()
+            x_pad, y_pad = (x_hi - x_lo) * 0.05, (y_hi - y_lo) * 0.05  # matplotlib's default margins
+            ax.set_autoscale_on(False)
+            ax.set_xlim(x_lo - x_pad, x_hi + x_pad); ax.set_ylim(y_lo - y_pad, y_hi + y_pad)
+        ax.plot(xdt.to_numpy(), y)
+        ax.set_xlabel(header[0]); ax.set_ylabel(header[1]); ax.set_title(question)
+    else:
+        ax.bar(range(len(x[:30])), y[:30], tick_label=x[:30])
+        plt.setp(ax.get_xticklabels(), rotation=45, ha="right", fontsize=8)
+        ax.set_ylabel(header[1]); ax.set_title(question)
 
-    out_png = os.path.join(OUT_DIR, "chart.png")
     plt.tight_layout(); plt.savefig(out_png); plt.close(fig)
     return out_png
 
 # ---------- Nodes ----------
-def node_agent(state: AgentState) -> AgentState:
-    out = sql_agent.invoke({"input": f"{SAFETY_PREFIX}\n\nQuestion: {state.question}"})
-    return state.model_copy(update={"raw_output": out["output"]})
+async def node_agent(state: AgentState) -> AgentState:
+    # Run one agent per question concurrently; a failing question only loses its own answer
+    outs = await get_sql_agent().abatch(
+        [{"input": f"{SAFETY_PREFIX}\n\nQuestion: {q}"} for q in state.questions],
+        return_exceptions=True,
+    )
+    state.raw_outputs = [None if isinstance(out, Exception) else out["output"] for out in outs]
+    state.errors = [f"{type(out).__name__}: {out}" if isinstance(out, Exception) else None for out in outs]
+    return state
 
 def node_parse_and_visualize(state: AgentState) -> AgentState:
-    if not state.raw_output:
-        return state.model_copy(update={"message": "No output from agent."})
-    parsed = parse_csv_from_text(state.raw_output)
-    if not parsed:
-        # no CSV; just return text
-        return state.model_copy(update={"message": state.raw_output})
-    header, rows = parsed
-    out_csv = os.path.join(OUT_DIR, "result.csv")
-    save_table(header, rows, out_csv)
-    chart_path = maybe_chart(header, rows, state.question)
-    msg = f"Saved {out_csv}" + (f" and {chart_path}" if chart_path else "")
-    return state.model_copy(update={"result_csv_path": out_csv, "chart_png_path": chart_path, "message": msg})
+    n = len(state.questions)
+    csv_paths, chart_paths, messages = [], [], []
+    for i, (question, raw_output, error) in enumerate(zip(state.questions, state.raw_outputs, state.errors)):
+        if error:
+            csv_paths.append(None); chart_paths.append(None)
+            messages.append(f"Agent error: {error}")
+            continue
+        if not raw_output:
+            csv_paths.append(None); chart_paths.append(None)
+            messages.append("No output from agent.")
+            continue
+        out_csv = indexed_path(os.path.join(OUT_DIR, "result.csv"), i, n)
+        parsed = parse_and_save(raw_output, out_csv)
+        if not parsed:
+            # no CSV; just return text
+            csv_paths.append(None); chart_paths.append(None)
+            messages.append(raw_output)
+            continue
+        header, x, y = parsed
+        chart_path = maybe_chart(header, x, y, question, indexed_path(os.path.join(OUT_DIR, "chart.png"), i, n))
+        csv_paths.append(out_csv); chart_paths.append(chart_path)
+        messages.append(f"Saved {out_csv}" + (f" and {chart_path}" if chart_path else ""))
+    state.result_csv_paths, state.chart_png_paths, state.messages = csv_paths, chart_paths, messages
+    return state
 
 # ---------- Graph ----------
 from langgraph.graph import StateGraph, START, END
@@ -128,8 +191,13 @@ def build_graph():
 
 graph = build_graph()
 
+def run_batch(questions: List[str]) -> dict:
+    """Run several questions through the graph in a single batched agent call."""
+    return asyncio.run(graph.ainvoke(AgentState(questions=questions)))
+
 # ---------- CLI ----------
 if __name__ == "__main__":
-    q = sys.argv[1] if len(sys.argv) > 1 else "Show revenue trend for the last 30 days"
-    final = graph.invoke(AgentState(question=q))
-    print("\n=== Agent Reply ===\n" + (final['message'] or ""))
+    qs = sys.argv[1:] or ["Show revenue trend for the last 30 days"]
+    final = run_batch(qs)
+    for q, msg in zip(qs, final["messages"]):
+        print(f"\n=== Agent Reply ===\nQ: {q}\n" + (msg or ""))
@@ -1,22 +1,30 @@
+import numpy as np
 import pandas as pd
 from faker import Faker
 import random
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import sqlite3
 import argparse
-from tqdm import tqdm
 import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 
 # Initialize Faker to generate realistic fake data
 fake = Faker()
+# NumPy generator for the bulk, column-wise draws
+rng = np.random.default_rng()
 
 # --- Configuration ---
 NUM_SALES_RECORDS = 10000
 NUM_PRODUCTS = 100
 NUM_STORES = 20
 NUM_FEEDBACK_RECORDS = 500
+# All generated timestamps are naive UTC, matching SQLite's 'now' and 'unixepoch'
 START_DATE = datetime(2024, 1, 1)
 DEFAULT_DATABASE = "data/lt_walmart_data.db"
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Below this many sales records, process start-up costs more than it saves
+PARALLEL_MIN_RECORDS = 100_000
 
 def generate_real_product_name():
     """Generates a more realistic product name for our LT_Walmart simulation."""
@@ -42,96 +50,206 @@ def generate_real_product_name():
     else:
         return f"{brand}-{product_type}"
 
+def random_uuids(n):
+    """Generates n random UUID4 strings from a single os.urandom draw."""
+    raw = os.urandom(16 * n)
+    return [str(uuid.UUID(bytes=raw[i * 16:(i + 1) * 16], version=4)) for i in range(n)]
+
+def random_timestamps(start_date, end_date, n, rng=rng):
+    """Draws n uniformly distributed microsecond timestamps between start_date and end_date."""
+    span_us = int((end_date - start_date) / timedelta(microseconds=1))
+    return np.datetime64(start_date, "us") + rng.integers(0, span_us, n).astype("timedelta64[us]")
+
+def random_epoch_seconds(start_date, end_date, n, rng=rng):
+    """Draws n uniformly distributed unix timestamps (int64 seconds) between naive UTC start_date and end_date."""
+    start_s = int(start_date.replace(tzinfo=timezone.utc).timestamp())
+    span_s = int((end_date - start_date).total_seconds())
+    return start_s + rng.integers(0, span_s, n, dtype=np.int64)
+
 def generate_master_data(num_products, num_stores):
     """Generates product and store master data with realistic, unique product names."""
-    product_list = []
+    product_ids, product_names = [], []
     generated_names = set()
     i = 0
-    while len(product_list) < num_products:
+    while len(product_ids) < num_products:
         name = generate_real_product_name()
         if name not in generated_names:
-            product_list.append({
-                "ProductID": f"PROD{100+i}",
-                "ProductName": name,
-                "Price": round(random.uniform(5.0, 500.0), 2)
-            })
+            product_ids.append(f"PROD{100+i}")
+            product_names.append(name)
             generated_names.add(name)
         i += 1
+    products_df = pd.DataFrame({
+        "ProductID": product_ids,
+        "ProductName": product_names,
+        "Price": np.round(rng.uniform(5.0, 500.0, num_products), 2),
+    })
 
-    store_list = [
-        {"StoreID": f"STORE{10+i}", "StoreLocation": fake.city()}
-        for i in range(num_stores)
-    ]
+    stores_df = pd.DataFrame({
+        "StoreID": [f"STORE{10+i}" for i in range(num_stores)],
+        "StoreLocation": [fake.city() for _ in range(num_stores)],
+    })
     print("Generated Product and Store master data.")
-    return product_list, store_list
-
-def generate_sales_data(num_records, product_list, store_list, start_date, end_date):
-    """Generates fake sales data."""
-    sales_data = []
-    for _ in tqdm(range(num_records), desc="Generating Sales Data"):
-        product = random.choice(product_list)
-        store = random.choice(store_list)
-        transaction_date = fake.date_time_between(start_date=start_date, end_date=end_date)
-        units_sold = random.randint(1, 10)
-
-        sales_data.append({
-            "TransactionID": fake.uuid4(),
-            "Date": transaction_date,
-            "StoreID": store["StoreID"],
-            "ProductID": product["ProductID"],
-            "ProductName": product["ProductName"],
-            "UnitsSold": units_sold,
-            "Price": product["Price"],
-            "TotalRevenue": round(units_sold * product["Price"], 2)
-        })
-    return pd.DataFrame(sales_data)
-
-def generate_inventory_data(product_list, store_list, start_date, end_date):
-    """Generates fake inventory data."""
-    inventory_data = []
-    for product in tqdm(product_list, desc="Generating Inventory Data"):
-        for store in store_list:
-            # Let's assume not every product is in every store
-            if random.random() > 0.2:  # 80% chance a product is in a given store
-                inventory_data.append({
-                    "ProductID": product["ProductID"],
-                    "StoreID": store["StoreID"],
-                    "StockLevel": random.randint(0, 500), # Some items might be out of stock
-                    "LastRestockDate": fake.date_between(start_date=start_date, end_date=end_date)
-                })
-    return pd.DataFrame(inventory_data)
-
-def generate_feedback_data(num_records, store_list, start_date, end_date):
-    """Generates fake customer feedback data."""
-    feedback_data = []
-    positive_keywords = ["love", "excellent", "great", "happy", "satisfied", "fast", "amazing"]
-    negative_keywords = ["bad", "slow", "disappointed", "broken", "poor", "unhappy", "terrible"]
-
-    for _ in tqdm(range(num_records), desc="Generating Feedback Data"):
-        store = random.choice(store_list)
-        feedback_date = fake.date_time_between(start_date=start_date, end_date=end_date)
-        
-        if random.random() > 0.4:  # 60% positive feedback
-            comment = f"I {random.choice(positive_keywords)} the service at the {store['StoreLocation']} store. The staff was very helpful."
-            sentiment = round(random.uniform(0.5, 1.0), 2)
-        else:  # 40% negative feedback
-            comment = f"The product I bought was {random.choice(negative_keywords)}. The checkout process at the {store['StoreLocation']} store was too {random.choice(negative_keywords)}."
-            sentiment = round(random.uniform(0.0, 0.49), 2)
-
-        feedback_data.append({
-            "FeedbackID": fake.uuid4(),
-            "Date": feedback_date,
-            "StoreID": store["StoreID"],
-            "Comment": comment,
-            "Sentiment": sentiment
-        })
-    return pd.DataFrame(feedback_data)
+    return products_df, stores_df
+
+def generate_sales_data(num_records, products_df, stores_df, start_date, end_date, rng=rng):
+    """Generates fake sales data, drawing every column as a NumPy array in one go."""
+    n = num_records
+    pidx = rng.integers(0, len(products_df), n)
+    sidx = rng.integers(0, len(stores_df), n)
+    units_sold = rng.integers(1, 11, n, dtype=np.int32)
+    # Cast the price column once; every record then just indexes into it
+    price_arr = products_df["Price"].to_numpy(dtype=np.float64)
+    prices = price_arr[pidx]
+
+    sales_df = pd.DataFrame({
+        "TransactionID": random_uuids(n),
+        "Date": random_epoch_seconds(start_date, end_date, n, rng),  # unix seconds, stored as INTEGER
+        "StoreID": stores_df["StoreID"].to_numpy()[sidx],
+        "ProductID": products_df["ProductID"].to_numpy()[pidx],
+        "ProductName": products_df["ProductName"].to_numpy()[pidx],
+        "UnitsSold": units_sold,
+        "Price": prices,
+        # Prices carry two decimals, so there are no half-cent ties and NumPy's
+        # round-half-even gives the same result as Python's round() did
+        "TotalRevenue": np.round(units_sold * prices, 2),
+    })
+    return sales_df
+
+def generate_sales_data_parallel(num_records, products_df, stores_df, start_date, end_date, workers=DEFAULT_WORKERS):
+    """Generates fake sales data in chunks across worker processes and concatenates them."""
+    if workers <= 1 or num_records < PARALLEL_MIN_RECORDS:
+        sales_df = generate_sales_data(num_records, products_df, stores_df, start_date, end_date)
+    else:
+        chunks = [num_records // workers + (i < num_records % workers) for i in range(workers)]
+        # Independent child streams, so forked workers don't repeat the parent's draws
+        seeds = np.random.SeedSequence().spawn(workers)
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(generate_sales_data, chunk, products_df, stores_df, start_date, end_date, np.random.default_rng(seed))
+                for chunk, seed in zip(chunks, seeds)
+            ]
+            sales_df = pd.concat([f.result() for f in futures], ignore_index=True)
+    print(f"Generated {num_records} sales records.")
+    return sales_df
+
+def generate_inventory_data(products_df, stores_df, start_date, end_date):
+    """Generates fake inventory data over the full product x store grid at once."""
+    # Let's assume not every product is in every store
+    in_store = rng.random((len(products_df), len(stores_df))) > 0.2  # 80% chance a product is in a given store
+    pidx, sidx = np.nonzero(in_store)
+    n = pidx.size
+
+    span_days = (end_date.date() - start_date.date()).days
+    restock = np.datetime64(start_date.date(), "D") + rng.integers(0, span_days + 1, n).astype("timedelta64[D]")
+
+    inventory_df = pd.DataFrame({
+        "ProductID": products_df["ProductID"].to_numpy()[pidx],
+        "StoreID": stores_df["StoreID"].to_numpy()[sidx],
+        "StockLevel": rng.integers(0, 501, n),  # Some items might be out of stock
+        "LastRestockDate": restock.astype(object),  # datetime.date values, stored as DATE
+    })
+    print(f"Generated {n} inventory records.")
+    return inventory_df
+
+def generate_feedback_data(num_records, stores_df, start_date, end_date):
+    """Generates fake customer feedback data from column-wise NumPy draws."""
+    positive_keywords = np.array(["love", "excellent", "great", "happy", "satisfied", "fast", "amazing"])
+    negative_keywords = np.array(["bad", "slow", "disappointed", "broken", "poor", "unhappy", "terrible"])
+
+    n = num_records
+    sidx = rng.integers(0, len(stores_df), n)
+    locations = stores_df["StoreLocation"].to_numpy()[sidx]
+    is_positive = rng.random(n) > 0.4  # 60% positive feedback
+    pos_words = positive_keywords[rng.integers(0, len(positive_keywords), n)]
+    neg_products = negative_keywords[rng.integers(0, len(negative_keywords), n)]
+    neg_checkouts = negative_keywords[rng.integers(0, len(negative_keywords), n)]
+
+    comments = [
+        f"I {pos} the service at the {loc} store. The staff was very helpful." if positive
+        else f"The product I bought was {neg_product}. The checkout process at the {loc} store was too {neg_checkout}."
+        for positive, pos, neg_product, neg_checkout, loc in zip(
+            is_positive.tolist(), pos_words.tolist(), neg_products.tolist(), neg_checkouts.tolist(), locations.tolist()
+        )
+    ]
+    sentiment = np.where(is_positive, rng.uniform(0.5, 1.0, n), rng.uniform(0.0, 0.49, n))
+
+    feedback_df = pd.DataFrame({
+        "FeedbackID": random_uuids(n),
+        "Date": random_timestamps(start_date, end_date, n),
+        "StoreID": stores_df["StoreID"].to_numpy()[sidx],
+        "Comment": comments,
+        "Sentiment": np.round(sentiment, 2),
+    })
+    print(f"Generated {n} feedback records.")
+    return feedback_df
+
+# Typed schema for every generated table, created once up front so loading is plain INSERTs.
+# Existing tables are dropped: each run regenerates the whole database.
+SCHEMA_DDL = """
+BEGIN;
+DROP TABLE IF EXISTS products;
+DROP TABLE IF EXISTS stores;
+DROP TABLE IF EXISTS sales_data;
+DROP TABLE IF EXISTS inventory;
+DROP TABLE IF EXISTS customer_feedback;
+CREATE TABLE products (ProductID TEXT, ProductName TEXT, Price REAL);
+CREATE TABLE stores (StoreID TEXT, StoreLocation TEXT);
+CREATE TABLE sales_data (
+    TransactionID TEXT, Date INTEGER, StoreID TEXT, ProductID TEXT,
+    ProductName TEXT, UnitsSold INTEGER, Price REAL, TotalRevenue REAL
+);
+CREATE TABLE inventory (ProductID TEXT, StoreID TEXT, StockLevel INTEGER, LastRestockDate DATE);
+CREATE TABLE customer_feedback (FeedbackID TEXT, Date TIMESTAMP, StoreID TEXT, Comment TEXT, Sentiment REAL);
+COMMIT;
+"""
+
+def create_schema(conn):
+    """(Re)creates all generated tables with their typed DDL."""
+    conn.executescript(SCHEMA_DDL)
+    print("Created database schema.")
 
 def save_to_sqlite(df, table_name, conn):
-    """Saves a DataFrame to a table in the specified SQLite database."""
-    df.to_sql(table_name, conn, if_exists='replace', index=False)
+    """Saves a DataFrame into its pre-created table (see SCHEMA_DDL) in the specified SQLite database.
+
+    Rows go through a single executemany inside one explicit transaction, so the
+    connection must be opened with isolation_level=None.
+    """
+    for col in df.columns:
+        # sqlite3 can't bind pandas Timestamps, and its date adapters are deprecated:
+        # store both as the same ISO text to_sql wrote
+        if df[col].dtype.kind == "M" or pd.api.types.infer_dtype(df[col]) == "date":
+            df = df.assign(**{col: df[col].astype(str)})
+    columns = ", ".join(df.columns)
+    placeholders = ", ".join("?" * len(df.columns))
+
+    conn.execute("BEGIN")
+    try:
+        # Convert whole columns to Python values at once and zip them into rows,
+        # rather than walking the frame row by row with itertuples
+        rows = zip(*(df[col].tolist() for col in df.columns))
+        conn.executemany(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", rows)
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
     print(f"Successfully generated and saved data to table '{table_name}'.")
 
+# Indexes for the agent's usual access paths: raw-seconds range filters, the
+# DATE(Date,'unixepoch') day expression from SAFETY_PREFIX, and product/store joins
+INDEX_DDL = """
+CREATE INDEX IF NOT EXISTS idx_sales_date ON sales_data(Date);
+CREATE INDEX IF NOT EXISTS idx_sales_day ON sales_data(DATE(Date, 'unixepoch'));
+CREATE INDEX IF NOT EXISTS idx_sales_prod ON sales_data(ProductID);
+CREATE INDEX IF NOT EXISTS idx_sales_store ON sales_data(StoreID);
+CREATE INDEX IF NOT EXISTS idx_fb_date ON customer_feedback(Date);
+ANALYZE;
+"""
+
+def create_indexes(conn):
+    """Indexes the bulk-loaded tables and refreshes the query planner statistics."""
+    conn.executescript(INDEX_DDL)
+    print("Created indexes on 'sales_data' and 'customer_feedback'.")
+
 def main():
     """Main function to parse arguments and generate data."""
     parser = argparse.ArgumentParser(description="Generate fake e-commerce data.")
@@ -139,10 +257,11 @@ def main():
     parser.add_argument("--products", type=int, default=NUM_PRODUCTS, help=f"Number of products to generate (default: {NUM_PRODUCTS}).")
     parser.add_argument("--stores", type=int, default=NUM_STORES, help=f"Number of stores to generate (default: {NUM_STORES}).")
     parser.add_argument("--feedback", type=int, default=NUM_FEEDBACK_RECORDS, help=f"Number of feedback records to generate (default: {NUM_FEEDBACK_RECORDS}).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Number of processes used to generate sales data (default: {DEFAULT_WORKERS}).")
     parser.add_argument("--db-file", type=str, default=DEFAULT_DATABASE, help=f"Name of the SQLite database file (default: {DEFAULT_DATABASE}).")
     args = parser.parse_args()
 
-    end_date = datetime.now()
+    end_date = datetime.now(timezone.utc).replace(tzinfo=None)
 
     # Ensure the database directory exists
     db_path = args.db_file
@@ -152,30 +271,40 @@ def main():
 
     # --- Create SQLite Connection and generate data ---
     try:
-        with sqlite3.connect(db_path) as conn:
+        with sqlite3.connect(db_path, isolation_level=None) as conn:
             print(f"Opened connection to SQLite database: {db_path}")
+            # Bulk-load settings: the data is regenerated from scratch, so durability can be relaxed.
+            # journal_mode persists in the file, so it is switched back after the load.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            create_schema(conn)
 
             # --- Generate Master Data ---
-            product_list, store_list = generate_master_data(args.products, args.stores)
+            products_df, stores_df = generate_master_data(args.products, args.stores)
 
             # --- Save Master Data ---
-            products_df = pd.DataFrame(product_list)
             save_to_sqlite(products_df, "products", conn)
-            stores_df = pd.DataFrame(store_list)
             save_to_sqlite(stores_df, "stores", conn)
 
             # --- Generate and Save Sales Data ---
-            sales_df = generate_sales_data(args.sales, product_list, store_list, START_DATE, end_date)
+            sales_df = generate_sales_data_parallel(args.sales, products_df, stores_df, START_DATE, end_date, args.workers)
             save_to_sqlite(sales_df, "sales_data", conn)
 
             # --- Generate and Save Inventory Data ---
-            inventory_df = generate_inventory_data(product_list, store_list, START_DATE, end_date)
+            inventory_df = generate_inventory_data(products_df, stores_df, START_DATE, end_date)
             save_to_sqlite(inventory_df, "inventory", conn)
 
             # --- Generate and Save Customer Feedback Data ---
-            feedback_df = generate_feedback_data(args.feedback, store_list, START_DATE, end_date)
+            feedback_df = generate_feedback_data(args.feedback, stores_df, START_DATE, end_date)
             save_to_sqlite(feedback_df, "customer_feedback", conn)
 
+            # --- Index once all rows are in, rather than maintaining indexes per insert ---
+            create_indexes(conn)
+            # WAL is only for the load: leave the file in rollback-journal mode so
+            # read-only consumers don't need to create -wal/-shm files next to it
+            conn.execute("PRAGMA journal_mode=DELETE")
+
         print("\nAll data generation complete.")
     except sqlite3.Error as e:
         print(f"\nDatabase error: {e}")
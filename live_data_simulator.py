@@ -1,14 +1,14 @@
 import pandas as pd
-from faker import Faker
 import random
 from datetime import datetime
 import time
 import os
 import argparse
 import sqlite3
+import uuid
 
-# Initialize Faker
-fake = Faker()
+SALES_COLUMNS = ("TransactionID", "Date", "StoreID", "ProductID", "ProductName", "UnitsSold", "Price", "TotalRevenue")
+INSERT_SALE_SQL = f"INSERT INTO sales_data ({', '.join(SALES_COLUMNS)}) VALUES ({', '.join('?' * len(SALES_COLUMNS))})"
 
 def load_master_data(db_path):
     """Loads product and store master data from a SQLite database."""
@@ -41,8 +41,8 @@ def generate_new_sale(product_list, store_list):
     units_sold = random.randint(1, 5) # Live transactions might be smaller on average
 
     sale_record = {
-        "TransactionID": fake.uuid4(),
-        "Date": datetime.now(),
+        "TransactionID": str(uuid.uuid4()),
+        "Date": int(time.time()),  # unix seconds, like the bulk-loaded rows
         "StoreID": store["StoreID"],
         "ProductID": product["ProductID"],
         "ProductName": product["ProductName"],
@@ -52,34 +52,50 @@ def generate_new_sale(product_list, store_list):
     }
     return sale_record
 
-def append_to_sqlite(record_df, table_name, conn):
-    """Appends a DataFrame to a table in the SQLite database."""
-    record_df.to_sql(table_name, conn, if_exists='append', index=False)
+def flush_sales(buffer, conn):
+    """Writes buffered sale rows in a single transaction and empties the buffer."""
+    if not buffer:
+        return
+    conn.executemany(INSERT_SALE_SQL, buffer)
+    conn.commit()
+    print(f"Flushed {len(buffer)} sale(s) to 'sales_data'.")
+    buffer.clear()
 
 def main():
     """Main function to run the live data simulator."""
     parser = argparse.ArgumentParser(description="Simulate live transactions by appending to a SQLite database.")
     parser.add_argument("--db-file", type=str, default="data/lt_walmart_data.db", help="Path to the SQLite database file (default: 'data/lt_walmart_data.db').")
     parser.add_argument("--interval", type=float, default=2.0, help="Average time in seconds between new transactions (default: 2.0).")
+    parser.add_argument("--batch", type=int, default=10, help="Number of buffered transactions that triggers a write (default: 10).")
+    parser.add_argument("--flush-interval", type=float, default=10.0, help="Maximum seconds between writes of buffered transactions (default: 10.0).")
     args = parser.parse_args()
 
     print("--- Live Transaction Simulator ---")
     print(f"Appending to 'sales_data' table in '{args.db_file}'.")
-    print(f"New transaction every ~{args.interval} seconds. Press Ctrl+C to stop.")
+    print(f"New transaction every ~{args.interval} seconds, written every {args.batch} transactions or {args.flush_interval} seconds. Press Ctrl+C to stop.")
 
     product_list, store_list = load_master_data(args.db_file)
 
     try:
         with sqlite3.connect(args.db_file) as conn:
-            while True:
-                new_sale = generate_new_sale(product_list, store_list)
-                new_sale_df = pd.DataFrame([new_sale])
-                append_to_sqlite(new_sale_df, "sales_data", conn)
-
-                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] New Sale: {new_sale['UnitsSold']}x '{new_sale['ProductName']}' at {new_sale['StoreID']}")
-
-                sleep_time = random.uniform(args.interval / 2, args.interval * 1.5)
-                time.sleep(sleep_time)
+            buffer = []
+            last_flush = time.monotonic()
+            try:
+                while True:
+                    new_sale = generate_new_sale(product_list, store_list)
+                    buffer.append(tuple(new_sale[col] for col in SALES_COLUMNS))
+
+                    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] New Sale: {new_sale['UnitsSold']}x '{new_sale['ProductName']}' at {new_sale['StoreID']}")
+
+                    if len(buffer) >= args.batch or time.monotonic() - last_flush >= args.flush_interval:
+                        flush_sales(buffer, conn)
+                        last_flush = time.monotonic()
+
+                    sleep_time = random.uniform(args.interval / 2, args.interval * 1.5)
+                    time.sleep(sleep_time)
+            finally:
+                # Don't lose whatever is still buffered when the simulator stops
+                flush_sales(buffer, conn)
 
     except KeyboardInterrupt:
         print("\n--- Simulator stopped by user. ---")